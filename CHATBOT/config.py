@@ -0,0 +1,7 @@
+import os
+
+# Shared between the FastAPI backend and the Streamlit frontend so the
+# frontend can find the checkpoint database without importing (and thereby
+# executing) the backend. The default is a relative path: run both processes
+# from this directory, or set CHECKPOINT_DB to an absolute path.
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "checkpoints.sqlite")
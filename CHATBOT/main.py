@@ -1,224 +1,334 @@
-from typing import TypedDict, Annotated, Optional
-from langgraph.graph import add_messages, StateGraph, END
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, ToolMessage, AIMessageChunk
-from dotenv import load_dotenv
-from langchain_community.tools.tavily_search import TavilySearchResults
-from fastapi import FastAPI, Query
-from fastapi.responses import StreamingResponse
-from fastapi.middleware.cors import CORSMiddleware
-import json
-from uuid import uuid4
-from langchain_core.tools import tool
-import requests
-from langgraph.checkpoint.memory import InMemorySaver
-
-load_dotenv()
-
-# Checkpointer
-memory = InMemorySaver()
-
-class State(TypedDict):
-    messages:Annotated[list, add_messages]
-    
-search_tool = TavilySearchResults(
-    max_results=5
-)
-@tool
-def get_stock_price(symbol: str) -> dict:
-    """
-    Use this tool ONLY to fetch the latest live stock price of a company.
-    Input must be a stock ticker symbol (e.g., 'AAPL' for Apple, 'TSLA' for Tesla).
-    Do NOT use search engines for stock prices.
-    """
-    url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={symbol}&apikey=BZZ2I89IVW76Q6UJ"
-    r = requests.get(url)
-    return r.json()
-
-tools = [search_tool, get_stock_price]
-
-llm = ChatGroq(model="llama-3.1-8b-instant")
-
-llm_with_tools = llm.bind_tools(tools=tools)
-
-async def model(state:State):
-    result = await llm_with_tools.ainvoke(
-        state["messages"]
-    )
-    return {"messages": [result] if not isinstance(result, list) else result}  
-    
-async def tool_router(state:State):
-    """Router to handle decisions wheather to call a tool or not"""
-    last_message = state["messages"][-1]
-    if "stock price" in last_message or "share price" in last_message:
-        return "tool_node"
-    last_message_obj = state["messages"][-1]
-    if hasattr(last_message_obj, "tool_calls") and len(last_message_obj.tool_calls) > 0:
-        return "tool_node"
-    else:
-        return END
-    
-async def tool_node(state:State):
-    """This is basically the tool node that handles the tool calls"""
-    tool_calls  = state["messages"][-1].tool_calls
-    tool_messages = []
-    for tool_call in tool_calls:
-        tool_name = tool_call["name"]
-        tool_args = tool_call["args"]
-        tool_id = tool_call["id"]
-        
-        
-        if tool_name == "tavily_search_results_json":
-            search_results = await search_tool.ainvoke(tool_args)
-            tool_message = ToolMessage(
-                content = str(search_results),
-                tool_call_id = tool_id,
-                name = tool_name
-            )
-        elif tool_name == "get_stock_price":
-            stock_data = get_stock_price.invoke(tool_args)   
-            tool_message = ToolMessage(
-                content=str(stock_data),
-                tool_call_id=tool_id,
-                name=tool_name
-            )
-
-        else:
-            tool_message = ToolMessage(
-                content=f"Tool {tool_name} not implemented.",
-                tool_call_id=tool_id,
-                name=tool_name
-            )
-        tool_messages.append(tool_message)
-        
-    return {"messages" : tool_messages}
-
-graph_builder = StateGraph(State)
-graph_builder.add_node("model", model)
-graph_builder.add_node("tool_node", tool_node)
-graph_builder.set_entry_point("model")
-
-graph_builder.add_conditional_edges("model", tool_router)
-graph_builder.add_edge("tool_node", "model")
-
-graph = graph_builder.compile(checkpointer=memory)
-
-app = FastAPI()
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["Content-Type"]
-)
-
-def serialise_ai_message_chunk(chunk): 
-    if(isinstance(chunk, AIMessageChunk)):
-        return chunk.content
-    else:
-        raise TypeError(
-            f"Object of type {type(chunk).__name__} is not correctly formatted for serialisation"
-        )
-
-
-async def generate_chat_responses(message: str, checkpoint_id: Optional[str] = None):
-    is_new_conversation = checkpoint_id is None
-    
-    if is_new_conversation:
-        new_checkpoint_id = str(uuid4())
-
-        config = {
-            "configurable": {
-                "thread_id": new_checkpoint_id
-            }
-        }
-        
-        events = graph.astream_events(
-            {"messages": [HumanMessage(content=message)]},
-            version="v2",
-            config=config
-        )
-        
-        yield f"data: {json.dumps({'type': 'checkpoint', 'checkpoint_id': new_checkpoint_id})}\n\n"
-    else:
-        config = {
-            "configurable": {
-                "thread_id": checkpoint_id
-            }
-        }
-
-        events = graph.astream_events(
-            {"messages": [HumanMessage(content=message)]},
-            version="v2",
-            config=config
-        )
-        
-    async for event in events:
-        event_type = event["event"]
-        
-        if event_type == "on_chat_model_stream":
-            chunk_content = serialise_ai_message_chunk(event["data"]["chunk"])
-            payload = {"type": "content", "content": chunk_content}
-            yield f"data: {json.dumps(payload)}\n\n"
-            
-        elif event_type == "on_chat_model_end":
-            output = event["data"]["output"]
-
-            if hasattr(output, "tool_calls") and output.tool_calls:
-                for call in output.tool_calls:
-                    tool_name = call["name"]
-
-                    # Generic tool start event
-                    payload = {
-                        "type": "tool_start",
-                        "tool": tool_name
-                    }
-                    yield f"data: {json.dumps(payload)}\n\n"
-
-                    # Keep old Tavily-specific search_start (optional)
-                    if tool_name == "tavily_search_results_json":
-                        search_query = call["args"].get("query", "")
-                        payload = {"type": "search_start", "query": search_query}
-                        yield f"data: {json.dumps(payload)}\n\n"
-
-                
-        elif event_type == "on_tool_end":
-            tool_name = event["name"]
-            output = event["data"]["output"]
-
-            if tool_name == "tavily_search_results_json":
-                if isinstance(output, list):
-                    urls = []
-                    for item in output:
-                        if isinstance(item, dict) and "url" in item:
-                            urls.append(item["url"])
-                    payload = {"type": "search_results", "urls": urls}
-                    yield f"data: {json.dumps(payload)}\n\n"
-
-            elif tool_name == "get_stock_price":
-                payload = {
-                    "type": "stock_result",
-                    "output": output
-                }
-                yield f"data: {json.dumps(payload)}\n\n"
-
-            else:
-                # Generic tool end (for future tools)
-                payload = {
-                    "type": "tool_end",
-                    "tool": tool_name,
-                    "output": output
-                }
-                yield f"data: {json.dumps(payload)}\n\n"
-
-    
-    yield f"data: {json.dumps({'type': 'end'})}\n\n"
-
-@app.get("/chat_stream/{message}")
-async def chat_stream(message: str, checkpoint_id: Optional[str] = Query(None)):
-    return StreamingResponse(
-        generate_chat_responses(message, checkpoint_id), 
-        media_type="text/event-stream"
-    )
\ No newline at end of file
+from typing import TypedDict, Annotated, Optional
+from langgraph.graph import add_messages, StateGraph, END
+from langchain_groq import ChatGroq
+from langchain_core.messages import HumanMessage, ToolMessage, AIMessageChunk
+from dotenv import load_dotenv
+from langchain_community.tools.tavily_search import TavilySearchResults
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import StreamingResponse, ORJSONResponse
+from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import orjson
+import zlib
+from uuid import uuid4
+from langchain_core.tools import tool
+import httpx
+import aiosqlite
+import os
+from contextlib import asynccontextmanager
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from config import CHECKPOINT_DB
+
+load_dotenv()
+
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:  # uvloop is unavailable on Windows
+    pass
+
+class State(TypedDict):
+    messages:Annotated[list, add_messages]
+    
+search_tool = TavilySearchResults(
+    max_results=5
+)
+
+# Shared pooled client so stock lookups reuse connections and never block
+# the event loop the way the old sync requests.get did
+_client = httpx.AsyncClient(timeout=12)
+
+ALPHAVANTAGE_API_KEY = os.getenv("ALPHAVANTAGE_API_KEY")
+
+@tool
+async def get_stock_price(symbol: str) -> dict:
+    """
+    Use this tool ONLY to fetch the latest live stock price of a company.
+    Input must be a stock ticker symbol (e.g., 'AAPL' for Apple, 'TSLA' for Tesla).
+    Do NOT use search engines for stock prices.
+    """
+    if not ALPHAVANTAGE_API_KEY:
+        raise ValueError("Set ALPHAVANTAGE_API_KEY to use get_stock_price.")
+    r = await _client.get(
+        "https://www.alphavantage.co/query",
+        params={"function": "GLOBAL_QUOTE", "symbol": symbol, "apikey": ALPHAVANTAGE_API_KEY},
+    )
+    return r.json()
+
+tools = [search_tool, get_stock_price]
+tool_map = {t.name: t for t in tools}
+
+llm = ChatGroq(model="llama-3.1-8b-instant")
+
+llm_with_tools = llm.bind_tools(tools=tools)
+
+async def model(state:State):
+    result = await llm_with_tools.ainvoke(
+        state["messages"]
+    )
+    return {"messages": [result] if not isinstance(result, list) else result}  
+    
+async def tool_router(state:State):
+    """Router to handle decisions wheather to call a tool or not"""
+    last_message = state["messages"][-1]
+    if getattr(last_message, "tool_calls", None):
+        return "tool_node"
+    else:
+        return END
+    
+async def run_tool(tool_name, tool_args):
+    """Dispatches a single tool call and returns its content string"""
+    tool = tool_map.get(tool_name)
+    if tool is None:
+        return f"Tool {tool_name} not implemented."
+    result = await tool.ainvoke(tool_args)
+    # orjson instead of str(): real JSON the model can parse, smaller than
+    # Python repr, and no recursive __repr__ walk over nested results
+    return orjson.dumps(result, default=str).decode()
+
+async def tool_node(state:State):
+    """This is basically the tool node that handles the tool calls"""
+    tool_calls  = state["messages"][-1].tool_calls
+
+    # Run independent tool calls concurrently instead of one after another,
+    # so total latency is the slowest call rather than the sum of all calls
+    coros = [run_tool(tool_call["name"], tool_call["args"]) for tool_call in tool_calls]
+    raw_results = await asyncio.gather(*coros, return_exceptions=True)
+
+    tool_messages = []
+    for tool_call, result in zip(tool_calls, raw_results):
+        if isinstance(result, BaseException):
+            result = f"Tool {tool_call['name']} failed: {result}"
+        tool_messages.append(ToolMessage(
+            content=result,
+            tool_call_id=tool_call["id"],
+            name=tool_call["name"]
+        ))
+
+    return {"messages" : tool_messages}
+
+graph_builder = StateGraph(State)
+graph_builder.add_node("model", model)
+graph_builder.add_node("tool_node", tool_node)
+graph_builder.set_entry_point("model")
+
+graph_builder.add_conditional_edges("model", tool_router)
+graph_builder.add_edge("tool_node", "model")
+
+# Checkpointer backed by SQLite so history is paged from disk instead of
+# growing process memory with every thread ever created. AsyncSqliteSaver
+# must be constructed inside a running event loop, so the graph is compiled
+# in the lifespan rather than at import time.
+graph = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global graph
+    conn = aiosqlite.connect(CHECKPOINT_DB)
+    graph = graph_builder.compile(checkpointer=AsyncSqliteSaver(conn))
+    yield
+    try:
+        await conn.close()
+    except ValueError:
+        pass  # the connection opens lazily and may never have started
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["Content-Type"]
+)
+
+def serialise_ai_message_chunk(chunk): 
+    if(isinstance(chunk, AIMessageChunk)):
+        return chunk.content
+    else:
+        raise TypeError(
+            f"Object of type {type(chunk).__name__} is not correctly formatted for serialisation"
+        )
+
+
+# Coalescing knobs: flush buffered tokens once the buffer is this big or
+# this old. Still feels real-time but cuts frames (and json + socket writes)
+# by an order of magnitude on long answers.
+FLUSH_MAX_CHARS = 64
+FLUSH_INTERVAL = 0.03  # seconds
+
+# Static frames serialized once at import instead of per request
+END_FRAME = b'data: {"type": "end"}\n\n'
+
+
+async def generate_chat_responses(message: str, checkpoint_id: Optional[str] = None):
+    is_new_conversation = checkpoint_id is None
+    
+    if is_new_conversation:
+        new_checkpoint_id = str(uuid4())
+
+        config = {
+            "configurable": {
+                "thread_id": new_checkpoint_id
+            }
+        }
+        
+        events = graph.astream_events(
+            {"messages": [HumanMessage.model_construct(content=message)]},
+            version="v2",
+            config=config
+        )
+        
+        # Checkpoint ids are plain uuids, so the frame is simple byte concat
+        yield b'data: {"type": "checkpoint", "checkpoint_id": "' + new_checkpoint_id.encode() + b'"}\n\n'
+    else:
+        config = {
+            "configurable": {
+                "thread_id": checkpoint_id
+            }
+        }
+
+        events = graph.astream_events(
+            {"messages": [HumanMessage.model_construct(content=message)]},
+            version="v2",
+            config=config
+        )
+        
+    loop = asyncio.get_running_loop()
+    buf = ""
+    last_flush = loop.time()
+
+    def flush():
+        nonlocal buf, last_flush
+        frame = b"data: " + orjson.dumps({"type": "content", "content": buf}) + b"\n\n"
+        buf = ""
+        last_flush = loop.time()
+        return frame
+
+    # A feeder task pumps graph events into a queue so the flush timeout can
+    # apply to queue.get(). Timing out __anext__ directly would cancel it,
+    # killing the astream_events generator and truncating the reply.
+    queue = asyncio.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for ev in events:
+                await queue.put(ev)
+        except BaseException as exc:
+            await queue.put(exc)
+        else:
+            await queue.put(done)
+
+    feeder = asyncio.create_task(pump())
+
+    try:
+        while True:
+            try:
+                if buf:
+                    # Wake up on idle so a partial buffer never sits unflushed
+                    event = await asyncio.wait_for(queue.get(), timeout=FLUSH_INTERVAL)
+                else:
+                    event = await queue.get()
+            except asyncio.TimeoutError:
+                yield flush()
+                continue
+
+            if event is done:
+                break
+            if isinstance(event, BaseException):
+                raise event
+
+            event_type = event["event"]
+
+            if event_type == "on_chat_model_stream":
+                buf += serialise_ai_message_chunk(event["data"]["chunk"])
+                if len(buf) >= FLUSH_MAX_CHARS or loop.time() - last_flush >= FLUSH_INTERVAL:
+                    yield flush()
+                continue
+
+            # Non-content event: flush buffered tokens first so ordering holds
+            if buf:
+                yield flush()
+
+            if event_type == "on_chat_model_end":
+                output = event["data"]["output"]
+
+                if hasattr(output, "tool_calls") and output.tool_calls:
+                    for call in output.tool_calls:
+                        tool_name = call["name"]
+
+                        # Generic tool start event
+                        payload = {
+                            "type": "tool_start",
+                            "tool": tool_name
+                        }
+                        yield b"data: " + orjson.dumps(payload) + b"\n\n"
+
+                        # Keep old Tavily-specific search_start (optional)
+                        if tool_name == "tavily_search_results_json":
+                            search_query = call["args"].get("query", "")
+                            payload = {"type": "search_start", "query": search_query}
+                            yield b"data: " + orjson.dumps(payload) + b"\n\n"
+
+                
+            elif event_type == "on_tool_end":
+                tool_name = event["name"]
+                output = event["data"]["output"]
+
+                if tool_name == "tavily_search_results_json":
+                    if isinstance(output, list):
+                        urls = []
+                        for item in output:
+                            if isinstance(item, dict) and "url" in item:
+                                urls.append(item["url"])
+                        payload = {"type": "search_results", "urls": urls}
+                        yield b"data: " + orjson.dumps(payload) + b"\n\n"
+
+                elif tool_name == "get_stock_price":
+                    payload = {
+                        "type": "stock_result",
+                        "output": output
+                    }
+                    yield b"data: " + orjson.dumps(payload) + b"\n\n"
+
+                else:
+                    # Generic tool end (for future tools)
+                    payload = {
+                        "type": "tool_end",
+                        "tool": tool_name,
+                        "output": output
+                    }
+                    yield b"data: " + orjson.dumps(payload) + b"\n\n"
+    finally:
+        feeder.cancel()
+
+    if buf:
+        yield flush()
+    yield END_FRAME
+
+async def _gzip_sse(frames):
+    # GZipMiddleware excludes text/event-stream, so compress in the generator.
+    # The frames share a fixed JSON prefix, which gzip shrinks several-fold;
+    # the explicit flush per frame is mandatory — without it zlib buffers
+    # nearly the whole stream until close.
+    gz = zlib.compressobj(wbits=31)  # gzip container
+    async for frame in frames:
+        data = gz.compress(frame) + gz.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield gz.flush(zlib.Z_FINISH)
+
+
+@app.get("/chat_stream/{message}")
+async def chat_stream(request: Request, message: str, checkpoint_id: Optional[str] = Query(None)):
+    body = generate_chat_responses(message, checkpoint_id)
+    # Keep proxies from buffering the stream
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        body = _gzip_sse(body)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(body, media_type="text/event-stream", headers=headers)
\ No newline at end of file
@@ -1,114 +1,155 @@
-import streamlit as st
-import sseclient
-import urllib.parse
-import json
-import uuid
-from main_updated import app_graph
-from langchain_core.messages import HumanMessage
-
-# ---------------------- UI SETUP ----------------------
-st.set_page_config(page_title="AI Chat with LangGraph", page_icon="🤖", layout="centered")
-st.title("Where should we begin 🤖")
-st.sidebar.title("Chat with MaxAGE")
-st.sidebar.header("My Conversations")
-
-# ---------------------- SESSION HELPERS ----------------------
-def generate_thread_id():
-    return str(uuid.uuid4())
-
-def add_thread(thread_id):
-    if thread_id not in st.session_state["chat_threads"]:
-        st.session_state["chat_threads"].append(thread_id)
-        
-def reset_thread():
-    thread_id = generate_thread_id() 
-    st.session_state["thread_id"] = thread_id
-    add_thread(thread_id)
-    st.session_state["messages"] = []
-    
-def load_conversation(thread_id):
-    state = app_graph.get_state(config={'configurable': {'thread_id': thread_id}})
-    return state.values.get('messages', [])
-
-# ---------------------- INITIALIZE SESSION STATE ----------------------
-if "messages" not in st.session_state:
-    st.session_state["messages"] = []
-if "thread_id" not in st.session_state:
-    st.session_state["thread_id"] = generate_thread_id()
-if "chat_threads" not in st.session_state:
-    st.session_state["chat_threads"] = []
-
-add_thread(st.session_state["thread_id"])
-
-# ---------------------- SIDEBAR ----------------------
-if st.sidebar.button("➕ New chat"):
-    reset_thread()
-
-for thread_id in st.session_state['chat_threads'][::-1]:
-    if st.sidebar.button(str(thread_id)):
-        st.session_state['thread_id'] = thread_id
-        messages = load_conversation(thread_id)
-
-        temp_messages = []
-        for msg in messages:
-            role = "user" if isinstance(msg, HumanMessage) else "assistant"
-            temp_messages.append({"role": role, "content": msg.content})
-        st.session_state["messages"] = temp_messages
-
-# ---------------------- SHOW CHAT HISTORY ----------------------
-for message in st.session_state["messages"]:
-    st.chat_message(message["role"]).write(message["content"])
-
-# ---------------------- BACKEND URL ----------------------
-BACKEND_URL = "http://127.0.0.1:8000/chat_stream/"
-
-# ---------------------- USER INPUT ----------------------
-if user_input := st.chat_input("Type your message..."):
-    st.session_state["messages"].append({"role": "user", "content": user_input})
-    st.chat_message("user").write(user_input)
-
-    full_url = f"{BACKEND_URL}{urllib.parse.quote(user_input)}"
-    if st.session_state["thread_id"]:
-        full_url += f"?thread_id={st.session_state['thread_id']}"
-
-    client = sseclient.SSEClient(full_url)
-
-    with st.chat_message("assistant"):
-        placeholder = st.empty()
-        response_text = ""
-        used_tools = []   # Track tools used in this reply
-
-        for event in client:
-            if event.event == "message":
-                data = json.loads(event.data)
-                event_type = data.get("type")
-
-                if event_type == "content":
-                    # Stream only incremental assistant text
-                    new_text = data.get("text", "")
-                    delta = new_text[len(response_text):]
-                    response_text = new_text
-                    placeholder.write(response_text)
-
-                elif event_type == "tool_start":
-                    tool = data.get("tool")
-                    if tool and tool not in used_tools:
-                        used_tools.append(tool)
-                    placeholder.write(response_text + f"\n\n⚙️ Using tool: **{tool}**")
-
-                elif event_type == "tool_end":
-                    tool = data.get("tool")
-                    placeholder.write(response_text + f"\n\n✅ Tool finished: **{tool}**")
-
-                elif event_type == "end":
-                    break
-
-        # Save assistant reply
-        st.session_state["messages"].append({"role": "assistant", "content": response_text})
-
-        # Sidebar: show which tools were used
-        if used_tools:
-            st.sidebar.write(f"🛠 Tools used for this reply: {', '.join(used_tools)}")
-
-
-
+import streamlit as st
+import httpx
+import urllib.parse
+import functools
+import orjson
+import sqlite3
+import time
+import uuid
+from config import CHECKPOINT_DB
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# ---------------------- UI SETUP ----------------------
+st.set_page_config(page_title="AI Chat with LangGraph", page_icon="🤖", layout="centered")
+st.title("Where should we begin 🤖")
+st.sidebar.title("Chat with MaxAGE")
+st.sidebar.header("My Conversations")
+
+# ---------------------- SESSION HELPERS ----------------------
+def generate_thread_id():
+    return str(uuid.uuid4())
+
+def add_thread(thread_id):
+    if thread_id not in st.session_state["chat_threads"]:
+        st.session_state["chat_threads"].append(thread_id)
+        
+def reset_thread():
+    thread_id = generate_thread_id() 
+    st.session_state["thread_id"] = thread_id
+    add_thread(thread_id)
+    st.session_state["messages"] = []
+    
+@st.cache_resource
+def get_checkpointer():
+    saver = SqliteSaver(sqlite3.connect(CHECKPOINT_DB, check_same_thread=False))
+    saver.setup()
+    return saver
+
+def _latest_checkpoint_id(thread_id):
+    cur = get_checkpointer().conn.execute(
+        "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? ORDER BY checkpoint_id DESC LIMIT 1",
+        (thread_id,),
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+@functools.lru_cache(maxsize=64)
+def _cached_messages(thread_id, checkpoint_id):
+    tup = get_checkpointer().get_tuple(config={'configurable': {'thread_id': thread_id}})
+    if tup is None:
+        return []
+    return tup.checkpoint.get('channel_values', {}).get('messages', [])
+
+def load_conversation(thread_id):
+    # Keyed on the latest checkpoint id, so repeated sidebar clicks are cache
+    # hits and only a new turn forces re-deserializing the history
+    return _cached_messages(thread_id, _latest_checkpoint_id(thread_id))
+
+# ---------------------- INITIALIZE SESSION STATE ----------------------
+if "messages" not in st.session_state:
+    st.session_state["messages"] = []
+if "thread_id" not in st.session_state:
+    st.session_state["thread_id"] = generate_thread_id()
+if "chat_threads" not in st.session_state:
+    st.session_state["chat_threads"] = []
+
+add_thread(st.session_state["thread_id"])
+
+# ---------------------- SIDEBAR ----------------------
+if st.sidebar.button("➕ New chat"):
+    reset_thread()
+
+# One selectbox instead of a button per thread: a single widget regardless of
+# thread count, and reversed() iterates without copying the list
+thread_options = list(reversed(st.session_state['chat_threads']))
+selected_thread = st.sidebar.selectbox(
+    "Conversations",
+    thread_options,
+    index=thread_options.index(st.session_state['thread_id']),
+    format_func=lambda tid: tid[:8],
+)
+if selected_thread != st.session_state['thread_id']:
+    st.session_state['thread_id'] = selected_thread
+    messages = load_conversation(selected_thread)
+
+    temp_messages = []
+    for msg in messages:
+        role = "user" if isinstance(msg, HumanMessage) else "assistant"
+        temp_messages.append({"role": role, "content": msg.content})
+    st.session_state["messages"] = temp_messages
+
+# ---------------------- SHOW CHAT HISTORY ----------------------
+for message in st.session_state["messages"]:
+    st.chat_message(message["role"]).write(message["content"])
+
+# ---------------------- BACKEND URL ----------------------
+BACKEND_URL = "http://127.0.0.1:8000/chat_stream/"
+
+# ---------------------- USER INPUT ----------------------
+if user_input := st.chat_input("Type your message..."):
+    st.session_state["messages"].append({"role": "user", "content": user_input})
+    st.chat_message("user").write(user_input)
+
+    full_url = f"{BACKEND_URL}{urllib.parse.quote(user_input)}"
+    if st.session_state["thread_id"]:
+        full_url += f"?thread_id={st.session_state['thread_id']}"
+
+    with st.chat_message("assistant"):
+        placeholder = st.empty()
+        response_text = ""
+        used_tools = []   # Track tools used in this reply
+        last_render = 0.0
+
+        with httpx.stream("GET", full_url, timeout=None) as resp:
+            for line in resp.iter_lines():
+                # Minimal SSE parsing: our backend only sends data: lines
+                if not line.startswith("data: "):
+                    continue
+                data = orjson.loads(line[len("data: "):])
+                event_type = data.get("type")
+
+                if event_type == "content":
+                    # Backend sends only the new chunk
+                    response_text += data.get("delta", "")
+                    # Streamlit re-renders the whole markdown on every write,
+                    # so throttle redraws to ~20/s instead of one per token
+                    now = time.monotonic()
+                    if now - last_render >= 0.05:
+                        placeholder.write(response_text)
+                        last_render = now
+
+                elif event_type == "tool_start":
+                    tool = data.get("tool")
+                    if tool and tool not in used_tools:
+                        used_tools.append(tool)
+                    placeholder.write(response_text + f"\n\n⚙️ Using tool: **{tool}**")
+
+                elif event_type == "tool_end":
+                    tool = data.get("tool")
+                    placeholder.write(response_text + f"\n\n✅ Tool finished: **{tool}**")
+
+                elif event_type == "end":
+                    break
+
+        placeholder.write(response_text)
+
+        # Save assistant reply
+        st.session_state["messages"].append({"role": "assistant", "content": response_text})
+
+        # Sidebar: show which tools were used
+        if used_tools:
+            st.sidebar.write(f"🛠 Tools used for this reply: {', '.join(used_tools)}")
+
+
+
@@ -2,18 +2,24 @@
 from __future__ import annotations
 
 import asyncio
-import json
-import os
 import uuid
+import zlib
+from contextlib import asynccontextmanager
 from typing import Annotated, Dict, List, Literal, Optional, TypedDict
 
 from dotenv import load_dotenv
 load_dotenv()
 
-import requests
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, JSONResponse, ORJSONResponse
+
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:  # uvloop is unavailable on Windows
+    pass
 
 from langchain_core.messages import HumanMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
@@ -21,10 +27,13 @@ from langchain_core.tools import tool
 from langchain_groq import ChatGroq
 
 from langchain_community.tools.tavily_search import TavilySearchResults
+import aiosqlite
 from langgraph.graph import StateGraph, END, START
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langgraph.graph.message import add_messages
 
+from config import CHECKPOINT_DB
+
 # ---- Import our new tools ----
 from tools import (
     get_weather,
@@ -33,6 +42,8 @@ from tools import (
     get_public_holidays,
     get_joke,
     get_stock_price,
+    get_http_client,
+    close_http_client,
 )
 
 
@@ -47,6 +58,12 @@ model = llm.bind_tools(ALL_TOOLS)
 class State(TypedDict):
     messages: Annotated[List, add_messages]
 
+def _hm(text: str) -> HumanMessage:
+    # The text reaching the endpoints is already a decoded, validated str
+    # (FastAPI handles path/body parsing), so skip pydantic validation; the
+    # add_messages reducer handles list concatenation in the graph state.
+    return HumanMessage.model_construct(content=text)
+
 def _get_last_ai_tool_calls(messages: List):
     if not messages:
         return []
@@ -68,12 +85,18 @@ async def model_node(state: State, config: RunnableConfig):
 
 async def tool_node(state: State, config: RunnableConfig):
     last = state["messages"][-1]
+    tool_calls = getattr(last, "tool_calls", []) or []
+    # Fan out independent tool calls concurrently; total latency is the max
+    # RTT instead of the sum. call_tool already maps failures to error dicts,
+    # return_exceptions keeps one bad call from poisoning the batch.
+    coros = [call_tool(tc.get("name"), tc.get("args") or {}) for tc in tool_calls]
+    raw_results = await asyncio.gather(*coros, return_exceptions=True)
     results = []
-    for tc in getattr(last, "tool_calls", []) or []:
+    for tc, result in zip(tool_calls, raw_results):
         name = tc.get("name")
-        args = tc.get("args") or {}
-        result = await call_tool(name, args)
-        results.append(ToolMessage(content=json.dumps(result), name=name, tool_call_id=tc["id"]))
+        if isinstance(result, BaseException):
+            result = {"error": str(result), "name": name}
+        results.append(ToolMessage(content=orjson.dumps(result, default=str).decode(), name=name, tool_call_id=tc["id"]))
     return {"messages": results}
 
 def route_tools(state: State) -> Literal["tool_node", "__end__"]:
@@ -86,11 +109,31 @@ graph_builder.add_node("tool_node", tool_node)
 graph_builder.add_edge(START, "model")
 graph_builder.add_conditional_edges("model", route_tools, {"tool_node": "tool_node", "__end__": END})
 graph_builder.add_edge("tool_node", "model")
-memory = MemorySaver()
-app_graph = graph_builder.compile(checkpointer=memory)
+# SQLite keeps checkpoints on disk instead of holding every thread's full
+# history in process memory forever, and lets the frontend read them too.
+# AsyncSqliteSaver must be constructed inside a running event loop, so the
+# graph is compiled in the lifespan below rather than at import time.
+app_graph = None
+graph = None  # alias kept for external imports; both are set in lifespan
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global app_graph, graph
+    conn = aiosqlite.connect(CHECKPOINT_DB)
+    app_graph = graph = graph_builder.compile(checkpointer=AsyncSqliteSaver(conn))
+    # The pooled httpx client lives for the whole process; expose it on
+    # app.state for any future endpoints and close it cleanly on shutdown.
+    app.state.http = get_http_client()
+    yield
+    await close_http_client()
+    try:
+        await conn.close()
+    except ValueError:
+        pass  # the connection opens lazily and may never have started
 
 
-app = FastAPI(title="Agentic Backend with Free Tools")
+app = FastAPI(title="Agentic Backend with Free Tools", default_response_class=ORJSONResponse, lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -103,24 +146,42 @@ app.add_middleware(
 async def health():
     return {"ok": True}
 
+# Static frames serialized once at import instead of per request
+END_FRAME = b'data: {"type": "end"}\n\n'
+
 async def _sse(stream):
+    # orjson serializes to bytes at C speed and StreamingResponse accepts a
+    # byte iterator, so frames skip the Python-level str encode entirely.
     async for event in stream:
-        if "messages" in event:
-           
-            last_msg = event["messages"][-1]
-            if hasattr(last_msg, "content") and isinstance(last_msg.content, str) and last_msg.type == "ai":
-                yield f"data: {json.dumps({'type': 'content', 'text': last_msg.content})}\n\n"
-        elif "event" in event:
-            ev = event["event"]
-            if ev.get("type") == "on_tool_start":
-                yield f"data: {json.dumps({'type': 'tool_start', 'tool': ev.get('name')})}\n\n"
-            elif ev.get("type") == "on_tool_end":
-                yield f"data: {json.dumps({'type': 'tool_end', 'tool': ev.get('name')})}\n\n"
-    yield "data: {\"type\": \"end\"}\n\n"
+        ev = event.get("event")
+        if ev == "on_chat_model_stream":
+            chunk = event["data"]["chunk"]
+            if isinstance(chunk.content, str) and chunk.content:
+                # Only the new chunk goes over the wire; re-sending the whole
+                # accumulated text made total bytes quadratic in reply length
+                yield b"data: " + orjson.dumps({"type": "content", "delta": chunk.content}) + b"\n\n"
+        elif ev == "on_tool_start":
+            yield b"data: " + orjson.dumps({"type": "tool_start", "tool": event.get("name")}) + b"\n\n"
+        elif ev == "on_tool_end":
+            yield b"data: " + orjson.dumps({"type": "tool_end", "tool": event.get("name")}) + b"\n\n"
+    yield END_FRAME
+
+
+async def _gzip_sse(frames):
+    # GZipMiddleware excludes text/event-stream, so compress in the generator.
+    # The frames share a fixed JSON prefix, which gzip shrinks several-fold;
+    # the explicit flush per frame is mandatory — without it zlib buffers
+    # nearly the whole stream until close.
+    gz = zlib.compressobj(wbits=31)  # gzip container
+    async for frame in frames:
+        data = gz.compress(frame) + gz.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield gz.flush(zlib.Z_FINISH)
 
 
 @app.get("/chat_stream/{message}")
-async def chat_stream(message: str, thread_id: Optional[str] = None):
+async def chat_stream(request: Request, message: str, thread_id: Optional[str] = None):
     """
     SSE endpoint used by the frontend. Creates/continues a thread in the graph.
     """
@@ -128,18 +189,24 @@ async def chat_stream(message: str, thread_id: Optional[str] = None):
         thread_id = str(uuid.uuid4())
     config = {"configurable": {"thread_id": thread_id}}
 
-    stream = app_graph.astream({"messages": [HumanMessage(content=message)]}, config, stream_mode="values")
-    return StreamingResponse(_sse(stream), media_type="text/event-stream")
+    stream = app_graph.astream_events(
+        {"messages": [_hm(message)]}, version="v2", config=config
+    )
+    body = _sse(stream)
+    # Keep proxies from buffering the stream
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        body = _gzip_sse(body)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(body, media_type="text/event-stream", headers=headers)
 
 
 @app.post("/chat")
 async def chat(payload: Dict[str, str]):
     text = payload.get("message", "")
     config = {"configurable": {"thread_id": str(uuid.uuid4())}}
-    final = await app_graph.ainvoke({"messages": [HumanMessage(content=text)]}, config)
+    final = await app_graph.ainvoke({"messages": [_hm(text)]}, config)
 
     msg = next((m for m in final["messages"][::-1] if getattr(m, "type", "") == "ai"), None)
     return JSONResponse({"reply": getattr(msg, "content", "")})
-
-
-graph = app_graph
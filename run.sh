@@ -0,0 +1,19 @@
+#!/usr/bin/env bash
+# Production launcher for the FastAPI backend.
+set -euo pipefail
+
+HOST="${HOST:-0.0.0.0}"
+PORT="${PORT:-8000}"
+# The workload is I/O bound: one async process handles many concurrent SSE
+# streams. Raise WORKERS only if a single core actually saturates.
+WORKERS="${WORKERS:-1}"
+
+exec uvicorn main_updated:app \
+    --host "$HOST" \
+    --port "$PORT" \
+    --workers "$WORKERS" \
+    --loop uvloop \
+    --http httptools \
+    --no-access-log \
+    --limit-concurrency 1024 \
+    --timeout-keep-alive 75
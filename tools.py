@@ -1,30 +1,79 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
 import math
-import requests
+import time
+import httpx
 from typing import Dict, Any, List, Optional
 from langchain_core.tools import tool
 
 DEFAULT_TIMEOUT = 12  # seconds
 
+# TTLs for results that barely change: coordinates are stable, ECB rates
+# update once a day, holiday calendars once a year. Jokes are never cached.
+GEOCODE_TTL = 7 * 24 * 3600
+FX_TTL = 6 * 3600
+HOLIDAYS_TTL = 30 * 24 * 3600
+
+_cache: Dict[Any, tuple] = {}
+_cache_lock = asyncio.Lock()
+
+async def _cached(key: Any, ttl: float, fetch) -> Any:
+    now = time.monotonic()
+    async with _cache_lock:
+        hit = _cache.get(key)
+        if hit and hit[0] > now:
+            return hit[1]
+    value = await fetch()
+    async with _cache_lock:
+        _cache[key] = (now + ttl, value)
+    return value
+
+# One shared client so every tool call reuses pooled connections instead of
+# paying a fresh TCP+TLS handshake per request.
+_client = httpx.AsyncClient(
+    timeout=DEFAULT_TIMEOUT,
+    limits=httpx.Limits(max_keepalive_connections=64, max_connections=256),
+)
+
+def get_http_client() -> httpx.AsyncClient:
+    return _client
+
+async def close_http_client() -> None:
+    await _client.aclose()
+
 class ToolError(Exception):
     pass
 
-def _get_json(url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+async def _get_json(url: str, params: Optional[Dict[str, Any]] = None) -> Any:
     try:
-        r = requests.get(url, params=params or {}, timeout=DEFAULT_TIMEOUT)
+        r = await _client.get(url, params=params or {})
         r.raise_for_status()
         return r.json()
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise ToolError(f"HTTP error for {url}: {e}") from e
     except ValueError as e:
         raise ToolError(f"Bad JSON from {url}: {e}") from e
 
 
+async def _geocode(location: str) -> Dict[str, Any]:
+    async def fetch():
+        geo = await _get_json(
+            "https://geocoding-api.open-meteo.com/v1/search",
+            {"name": location, "count": 1, "language": "en", "format": "json"},
+        )
+        results = geo.get("results") or []
+        if not results:
+            raise ToolError(f"Location not found: {location}")
+        return results[0]
+
+    return await _cached(("geocode", location.lower().strip()), GEOCODE_TTL, fetch)
+
+
 @tool
-def get_weather(location: str, days: int = 1) -> Dict[str, Any]:
+async def get_weather(location: str, days: int = 1) -> Dict[str, Any]:
     """
     Get current weather and up to 7-day daily forecast for a place.
 
@@ -39,15 +88,8 @@ def get_weather(location: str, days: int = 1) -> Dict[str, Any]:
     if not location or not location.strip():
         raise ToolError("Please provide a non-empty location string.")
     days = max(1, min(int(days), 7))
-   
-    geo = _get_json(
-        "https://geocoding-api.open-meteo.com/v1/search",
-        {"name": location, "count": 1, "language": "en", "format": "json"},
-    )
-    results = geo.get("results") or []
-    if not results:
-        raise ToolError(f"Location not found: {location}")
-    place = results[0]
+
+    place = await _geocode(location)
     lat = place["latitude"]
     lon = place["longitude"]
     resolved_name = place.get("name")
@@ -55,7 +97,7 @@ def get_weather(location: str, days: int = 1) -> Dict[str, Any]:
     timezone = place.get("timezone")
 
     # 2) Forecast
-    forecast = _get_json(
+    forecast = await _get_json(
         "https://api.open-meteo.com/v1/forecast",
         {
             "latitude": lat,
@@ -84,7 +126,7 @@ def get_weather(location: str, days: int = 1) -> Dict[str, Any]:
 
 
 @tool
-def get_exchange_rate(base: str, target: str, amount: float = 1.0) -> Dict[str, Any]:
+async def get_exchange_rate(base: str, target: str, amount: float = 1.0) -> Dict[str, Any]:
     """
     Convert an amount from one fiat currency to another using daily ECB rates.
 
@@ -103,10 +145,13 @@ def get_exchange_rate(base: str, target: str, amount: float = 1.0) -> Dict[str,
     amount = float(amount)
 
 
-    data = _get_json(
-        "https://api.frankfurter.dev/v1/latest",
-        {"base": base, "symbols": target},
-    )
+    async def fetch():
+        return await _get_json(
+            "https://api.frankfurter.dev/v1/latest",
+            {"base": base, "symbols": target},
+        )
+
+    data = await _cached(("fx", base, target), FX_TTL, fetch)
     rates = data.get("rates") or {}
     if target not in rates:
         raise ToolError(f"Unsupported currency pair {base}->{target}.")
@@ -125,7 +170,7 @@ def get_exchange_rate(base: str, target: str, amount: float = 1.0) -> Dict[str,
 # --------------------------------------
 
 @tool
-def get_crypto_spot_price(symbol: str, currency: str = "USD") -> Dict[str, Any]:
+async def get_crypto_spot_price(symbol: str, currency: str = "USD") -> Dict[str, Any]:
     """
     Get the current spot price for a cryptocurrency pair from Coinbase.
 
@@ -139,7 +184,7 @@ def get_crypto_spot_price(symbol: str, currency: str = "USD") -> Dict[str, Any]:
     if not symbol:
         raise ToolError("Please provide a crypto 'symbol', e.g., BTC or ETH.")
     pair = f"{symbol.upper()}-{currency.upper()}"
-    data = _get_json(f"https://api.coinbase.com/v2/prices/{pair}/spot")
+    data = await _get_json(f"https://api.coinbase.com/v2/prices/{pair}/spot")
     # Coinbase returns strings for amounts
     price = data.get("data", {}).get("amount")
     if price is None:
@@ -153,7 +198,7 @@ def get_crypto_spot_price(symbol: str, currency: str = "USD") -> Dict[str, Any]:
 
 
 @tool
-def get_public_holidays(year: int, country_code: str) -> List[Dict[str, Any]]:
+async def get_public_holidays(year: int, country_code: str) -> List[Dict[str, Any]]:
     """
     Get all public holidays for a given year and ISO 3166-1 alpha-2 country code.
 
@@ -167,7 +212,11 @@ def get_public_holidays(year: int, country_code: str) -> List[Dict[str, Any]]:
     if not country_code or len(country_code.strip()) != 2:
         raise ToolError("Provide a valid ISO 3166-1 alpha-2 country code (e.g., IN, US).")
     country_code = country_code.upper()
-    data = _get_json(f"https://date.nager.at/api/v3/PublicHolidays/{int(year)}/{country_code}")
+
+    async def fetch():
+        return await _get_json(f"https://date.nager.at/api/v3/PublicHolidays/{int(year)}/{country_code}")
+
+    data = await _cached(("holidays", int(year), country_code), HOLIDAYS_TTL, fetch)
     # Ensure minimal normalization
     holidays = []
     for h in data:
@@ -182,7 +231,7 @@ def get_public_holidays(year: int, country_code: str) -> List[Dict[str, Any]]:
 
 
 @tool
-def get_joke(category: str = "Programming", safe_mode: bool = True) -> Dict[str, Any]:
+async def get_joke(category: str = "Programming", safe_mode: bool = True) -> Dict[str, Any]:
     """
     Get a random joke. Default category is 'Programming'.
 
@@ -197,7 +246,7 @@ def get_joke(category: str = "Programming", safe_mode: bool = True) -> Dict[str,
     params = {"type": "single"}  # one-liners are easier to present
     if safe_mode:
         params["safe-mode"] = ""
-    data = _get_json(f"https://v2.jokeapi.dev/joke/{cat}", params=params)
+    data = await _get_json(f"https://v2.jokeapi.dev/joke/{cat}", params=params)
     if data.get("error"):
         raise ToolError(f"JokeAPI error: {data}")
     if data.get("type") == "single":
@@ -207,7 +256,7 @@ def get_joke(category: str = "Programming", safe_mode: bool = True) -> Dict[str,
 
 
 @tool
-def get_stock_price(symbol: str) -> Dict[str, Any]:
+async def get_stock_price(symbol: str) -> Dict[str, Any]:
     """
     Get the latest stock price using AlphaVantage's GLOBAL_QUOTE.
 
@@ -222,7 +271,7 @@ def get_stock_price(symbol: str) -> Dict[str, Any]:
     api_key = os.getenv("ALPHAVANTAGE_API_KEY")
     if not api_key:
         raise ToolError("Set ALPHAVANTAGE_API_KEY to use get_stock_price.")
-    data = _get_json(
+    data = await _get_json(
         "https://www.alphavantage.co/query",
         {"function": "GLOBAL_QUOTE", "symbol": symbol.upper(), "apikey": api_key},
     )